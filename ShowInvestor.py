@@ -2,87 +2,183 @@
 import streamlit as st
 import mysql.connector  # Add this for MySQL connectivity
 import pandas as pd
+import numpy as np
 import plotly.express as px
 from io import BytesIO
 from datetime import datetime
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer, PageBreak, Image
+from concurrent.futures import ThreadPoolExecutor
+from reportlab.pdfgen import canvas as pdf_canvas
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.utils import ImageReader
 from reportlab.lib import colors
-from matplotlib import pyplot as plt  # Add this for generating charts
+import matplotlib
+matplotlib.use("Agg")  # Headless rasterizer for chart generation
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import hashlib  # Add this for password hashing
+import hmac  # For constant-time hash comparison
+
+# Optional: numba JIT-compiles the review classification when the number
+# of periods is large (e.g. daily granularity across several years)
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
 
 # --- 1. MySQL Connection ---
+@st.cache_resource
+def get_connection_pool():
+    """
+    Build the shared MySQL connection pool once per server process.
+    Streamlit's cache_resource keeps it alive across script reruns, so
+    logins reuse already-authenticated connections instead of paying the
+    TCP + auth handshake every time.
+    """
+    return mysql.connector.pooling.MySQLConnectionPool(
+        pool_name="si",
+        pool_size=8,
+        host="localhost",
+        database="ShowInvestorDB",
+        user="root",
+        password="Tohseen23#"
+    )
+
 def create_connection():
     """
-    Establish a connection to the MySQL database.
-    Returns the connection object if successful, otherwise None.
+    Borrow a connection from the shared pool.
+    Closing the returned connection hands it back to the pool.
+    Raises mysql.connector.Error if the database is unreachable.
     """
-    try:
-        conn = mysql.connector.connect(
-            host="localhost",
-            database="ShowInvestorDB",
-            user="root",
-            password="Tohseen23#"
-        )
-        if conn.is_connected():
-            return conn
-    except mysql.connector.Error as e:
-        st.error(f"Error: {e}")
-        return None
+    return get_connection_pool().get_connection()
 
 # --- 2. Hash Password ---
-def hash_password(password):
-    """Hash a password using SHA-256 for secure storage."""
-    return hashlib.sha256(password.encode()).hexdigest()
+def hash_password(password, salt):
+    """
+    Hash a password with scrypt (memory-hard) for secure storage.
+    Raw SHA-256 is hardware-accelerated to billions of hashes per second,
+    which makes stolen hashes cheap to brute-force; scrypt keeps offline
+    cracking expensive while adding only a bounded (~tens of ms) cost to
+    a legitimate login. The salt is stored per-user in the users table.
+    """
+    return hashlib.scrypt(password.encode(), salt=salt, n=2**14, r=8, p=1, dklen=32).hex()
 
 # --- 3. Validate User ---
-def validate_user(username, password):
+@st.cache_resource(ttl=300)
+def get_user_table():
     """
-    Validate user credentials against the database.
-    Returns the user's role if valid, otherwise None.
+    Load the small users table into memory once per process, mapping
+    username -> (password hash, salt, role). Refreshed every 5 minutes
+    by the TTL; call get_user_table.clear() after admin changes to the
+    users table to pick them up immediately.
+    Lets mysql.connector.Error propagate if the database is unreachable:
+    cache_resource does not cache a raising call, so the next login
+    retries instead of pinning an empty table for the whole TTL.
     """
     conn = create_connection()
-    if conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-        user = cursor.fetchone()
-        conn.close()
-
-        if user and hash_password(password) == user["password"]:
-            return user["role"]
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT username, password, salt, role FROM users")
+        table = {username: (password, salt, role)
+                 for username, password, salt, role in cursor.fetchall()}
+        cursor.close()
+    finally:
+        conn.close()  # Returns the connection to the pool
+    return table
+
+def validate_user(username, password):
+    """
+    Validate user credentials against the cached user table -- a dict
+    lookup plus a hash check, with no database round trip per login.
+    Returns the user's role if valid, otherwise None. A database outage
+    is reported via st.error rather than read as bad credentials.
+    """
+    try:
+        user_table = get_user_table()
+    except mysql.connector.Error as e:
+        st.error(f"Error: {e}")
+        return None
+
+    row = user_table.get(username)
+    # compare_digest avoids leaking the matching prefix length via timing
+    if row and hmac.compare_digest(hash_password(password, row[1]), row[0]):
+        return row[2]
     return None
 
 # --- 4. Analyze Data ---
+# Display names for the int8 'Type' codes stored in analyzed frames
+TYPE_NAMES = {0: "Expense", 1: "Sales"}
+
 def analyze_data(df):
     """
     Preprocess and classify financial data.
-    Adds 'Type' (Sales or Expense) and 'Month' columns to the DataFrame.
-    Ensures months are arranged in proper monthly order.
+    Adds 'Type' (1 for Sales, 0 for Expense; see TYPE_NAMES) and 'Month'
+    columns to the DataFrame. Ensures months are arranged in proper
+    monthly order.
     """
     # Ensure 'Amount' column is numeric (converting any non-numeric values to NaN)
     df["Amount"] = pd.to_numeric(df["Amount"], errors="coerce")
-    
+
     # Remove rows with NaN values in the 'Amount' column
     df = df.dropna(subset=["Amount"])
-    
+
+    # Store Amount as float32: two-decimal currency fits well within its
+    # 7 significant digits, and halving the element size halves the memory
+    # bandwidth of every aggregation downstream
+    df["Amount"] = df["Amount"].astype(np.float32)
+
     # Convert 'Date' to datetime format
     df["Date"] = pd.to_datetime(df["Date"])
-    
-    # Classify transactions as either 'Sales' (positive) or 'Expense' (negative)
-    df["Type"] = df["Amount"].apply(lambda x: "Sales" if x > 0 else "Expense")
-    
-    # Create a 'Month' column from the 'Date' column (using month names)
-    df["Month"] = df["Date"].dt.strftime("%B")  # 'Month' as full name (e.g., 'January', 'February')
-    
-    # Ensure months are ordered chronologically, not alphabetically
-    month_order = ['January', 'February', 'March', 'April', 'May', 'June', 
+
+    # Classify transactions as 'Sales' (positive) or 'Expense' (negative),
+    # stored as compact int8 codes from a single vectorized comparison
+    df["Type"] = (df["Amount"].to_numpy() > 0).astype(np.int8)
+
+    # Create a 'Month' column directly from the month number, ordered
+    # chronologically (not alphabetically). Building the Categorical from
+    # integer codes skips per-row timestamp formatting and string parsing.
+    # Missing dates (NaT) map to code -1, which from_codes treats as NaN,
+    # so such rows drop out of the monthly groupbys instead of erroring.
+    month_order = ['January', 'February', 'March', 'April', 'May', 'June',
                    'July', 'August', 'September', 'October', 'November', 'December']
-    df["Month"] = pd.Categorical(df["Month"], categories=month_order, ordered=True)
+    month_codes = df["Date"].dt.month.sub(1).fillna(-1).astype("int8")
+    df["Month"] = pd.Categorical.from_codes(
+        month_codes, categories=month_order, ordered=True
+    )
+
+    # Keep 'Description' as an Arrow-backed string column, never Categorical:
+    # product names are high-cardinality, and grouping on a high-cardinality
+    # Categorical key is a known pandas slow path. PyArrow strings hash
+    # efficiently in groupby without that pitfall.
+    df["Description"] = df["Description"].astype("string[pyarrow]")
     
-    return df.sort_values("Month")
+    # No final sort: every consumer aggregates via groupby, and the ordered
+    # Month categorical keeps grouped output in calendar order regardless of
+    # row order, so sorting the whole frame here would be wasted work
+    return df
 
 # --- 5. Generate Insights ---
+# Review messages for the monthly performance summaries
+POSITIVE_REVIEW = "The business performed well this month with a positive profit margin."
+NEGATIVE_REVIEW = "Expenses were higher than sales, resulting in a loss this month. Consider reducing expenses."
+BALANCED_REVIEW = "Sales and expenses were balanced this month."
+
+# Review strings indexed by classification code (0: profit, 1: loss, 2: balanced)
+REVIEW_TABLE = np.array([POSITIVE_REVIEW, NEGATIVE_REVIEW, BALANCED_REVIEW])
+
+if njit is not None:
+    @njit(cache=True, parallel=True)
+    def _classify_profits(profits):
+        """Classify each profit value into a review code in a compiled loop."""
+        codes = np.empty(profits.size, np.int8)
+        for i in prange(profits.size):
+            if profits[i] > 0:
+                codes[i] = 0
+            elif profits[i] < 0:
+                codes[i] = 1
+            else:
+                codes[i] = 2
+        return codes
+
 def generate_insights(df):
     """
     Generate key business metrics and insights.
@@ -91,50 +187,82 @@ def generate_insights(df):
         - Monthly summary (grouped by 'Month' and 'Type')
         - Product performance analysis
     """
-    # Calculate total sales (positive values in 'Amount' column)
-    total_sales = df[df["Type"] == "Sales"]["Amount"].sum()
-
-    # Calculate total expenses (negative values in 'Amount' column)
-    total_expenses = df[df["Type"] == "Expense"]["Amount"].sum()
-
-    # Calculate net profit (sales + expenses)
-    net_profit = total_sales + total_expenses
-
-    # Generate monthly summary (grouped by 'Month' and 'Type')
-    monthly_summary = df.groupby(["Month", "Type"])["Amount"].sum().reset_index()
-
-    # Generate monthly profit (Sales - Expenses)
-    monthly_reviews = []
-    for month in monthly_summary["Month"].unique():
-        sales = monthly_summary[(monthly_summary["Month"] == month) & (monthly_summary["Type"] == "Sales")]["Amount"].sum()
-        expenses = monthly_summary[(monthly_summary["Month"] == month) & (monthly_summary["Type"] == "Expense")]["Amount"].sum()
-        profit = sales + expenses  # Profit = Sales - Expenses
-
-        # Add a brief review
-        if profit > 0:
-            review = "The business performed well this month with a positive profit margin."
-        elif profit < 0:
-            review = "Expenses were higher than sales, resulting in a loss this month. Consider reducing expenses."
-        else:
-            review = "Sales and expenses were balanced this month."
-
-        monthly_reviews.append({
-            "Month": month,
-            "Sales": sales,
-            "Expenses": expenses,
-            "Profit": profit,
-            "Review": review
-        })
-
-    # Product performance
-    product_performance = df[df["Type"] == "Sales"].groupby("Description")["Amount"].sum().reset_index()
-    product_performance = product_performance.sort_values(by="Amount", ascending=False)
-
-    # Top-performing products
-    top_products = product_performance.head(5)
+    # Compute the headline totals straight from the underlying arrays,
+    # sharing a single Sales mask instead of re-scanning 'Type' and
+    # materializing a filtered copy of the frame for each total
+    amounts = df["Amount"].to_numpy()
+    is_sale = df["Type"].to_numpy() == 1
+
+    # Total sales (positive values in 'Amount' column)
+    total_sales = amounts[is_sale].sum()
+
+    # Total expenses (negative values in 'Amount' column)
+    total_expenses = amounts[~is_sale].sum()
+
+    # Net profit (sales + expenses) -- the full sum, no masking needed
+    net_profit = amounts.sum()
+
+    # Generate monthly summary (grouped by 'Month' and 'Type').
+    # observed=True keeps pandas from materializing every empty
+    # (Month, Type) combination of the categorical keys, and sort=False
+    # skips an internal sort we don't rely on here.
+    monthly_summary = df.groupby(["Month", "Type"], observed=True, sort=False)["Amount"].sum().reset_index()
+    monthly_summary["Type"] = monthly_summary["Type"].map(TYPE_NAMES)  # Codes -> names for display
+
+    # Generate monthly profit (Sales - Expenses) by pivoting the Sales and
+    # Expense totals into columns in a single aggregation pass, instead of
+    # re-filtering the summary frame twice for every month
+    pivot = (
+        df.groupby(["Month", "Type"], observed=True)["Amount"]
+        .sum()
+        .unstack("Type", fill_value=0.0)
+        .rename(columns={1: "Sales", 0: "Expenses"})
+    )
+    for col in ("Sales", "Expenses"):
+        if col not in pivot.columns:
+            pivot[col] = 0.0
+    pivot["Profit"] = pivot["Sales"] + pivot["Expenses"]  # Profit = Sales - Expenses
+
+    # Add a brief review per period, classified vectorized over the Profit
+    # column. For large period counts the numba kernel replaces the nested
+    # np.where passes with one compiled parallel loop; below that threshold
+    # JIT warmup would dominate, so plain NumPy wins.
+    profits = pivot["Profit"].to_numpy()
+    if njit is not None and profits.size > 1_000:
+        review_codes = _classify_profits(profits)
+    else:
+        review_codes = np.where(profits > 0, 0, np.where(profits < 0, 1, 2))
+    pivot["Review"] = REVIEW_TABLE[review_codes]
+
+    # Pre-format the currency strings once, vectorized over the pivot
+    # columns, so the dashboard and PDF render cached strings instead of
+    # re-running a Python format call per value on every rerun
+    naira = "₦{:,.2f}".format
+    pivot["Sales_fmt"] = pivot["Sales"].map(naira)
+    pivot["Expenses_fmt"] = pivot["Expenses"].abs().map(naira)
+    pivot["Profit_fmt"] = pivot["Profit"].map(naira)
+
+    # One C-level pass over the pivot rows -- no per-month unique()/mask scans
+    monthly_reviews = pivot.reset_index().to_dict("records")
+
+    # Product performance (Description stays a plain string column -- converting
+    # a high-cardinality key to Categorical would slow the groupby down)
+    product_amount = df.loc[is_sale].groupby("Description", observed=True, sort=False)["Amount"].sum()
+
+    # Chart data: cap at the 50 best sellers plus an 'Other' bucket, so the
+    # browser renders a bounded number of bars regardless of catalog size
+    top_sellers = product_amount.nlargest(50)
+    if product_amount.size > top_sellers.size:
+        other = product_amount.sum() - top_sellers.sum()
+        top_sellers = pd.concat([top_sellers, pd.Series({"Other": other})]).rename("Amount")
+    product_performance = top_sellers.rename_axis("Description").reset_index()
+
+    # Top-performing products -- nlargest keeps a bounded heap instead of
+    # fully sorting the catalog: O(N log 5) vs O(N log N)
+    top_products = product_amount.nlargest(5).reset_index()
 
     # Underperforming products
-    underperforming_products = product_performance.tail(5)
+    underperforming_products = product_amount.nsmallest(5).reset_index()
 
     insights = {
         "total_sales": total_sales,
@@ -153,134 +281,246 @@ def generate_insights(df):
 def generate_aggregate_chart(monthly_reviews):
     """
     Generate a bar chart for aggregate performance across all months.
+    Draws on a standalone Agg Figure instead of pyplot's global state
+    manager, which is cheaper per chart and safe to call from threads.
     """
     months = [review["Month"] for review in monthly_reviews]
     sales = [review["Sales"] for review in monthly_reviews]
     expenses = [abs(review["Expenses"]) for review in monthly_reviews]
     profit = [review["Profit"] for review in monthly_reviews]
 
-    plt.figure(figsize=(8, 5))
-    plt.bar(months, sales, label="Sales", color="green", alpha=0.7)
-    plt.bar(months, expenses, label="Expenses", color="red", alpha=0.7)
-    plt.plot(months, profit, label="Profit", color="blue", marker="o", linestyle="--")
-    plt.title("Overall Performance - Sales, Expenses, and Profit")
-    plt.xlabel("Months")
-    plt.ylabel("Amount (₦)")
-    plt.legend()
-    plt.xticks(rotation=45)
+    fig = Figure(figsize=(8, 5))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.bar(months, sales, label="Sales", color="green", alpha=0.7)
+    ax.bar(months, expenses, label="Expenses", color="red", alpha=0.7)
+    ax.plot(months, profit, label="Profit", color="blue", marker="o", linestyle="--")
+    ax.set_title("Overall Performance - Sales, Expenses, and Profit")
+    ax.set_xlabel("Months")
+    ax.set_ylabel("Amount (₦)")
+    ax.legend()
+    ax.tick_params(axis="x", rotation=45)
 
     chart = BytesIO()
-    plt.savefig(chart, format="png")
+    canvas.print_png(chart)
     chart.seek(0)
-    plt.close()
     return chart
 
 # --- Helper Function: Generate Monthly Chart ---
 def generate_monthly_chart(month, sales, expenses):
     """
     Generate a bar chart for monthly sales and expenses.
+    Uses its own Agg Figure, so charts can be rendered in parallel.
     """
     labels = ["Sales", "Expenses"]
     values = [sales, abs(expenses)]
-    colors = ["green", "red"]
+    bar_colors = ["green", "red"]
 
-    plt.figure(figsize=(6, 4))
-    plt.bar(labels, values, color=colors)
-    plt.title(f"Performance for {month}")
-    plt.ylabel("Amount (₦)")
+    fig = Figure(figsize=(6, 4))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.bar(labels, values, color=bar_colors)
+    ax.set_title(f"Performance for {month}")
+    ax.set_ylabel("Amount (₦)")
 
     chart = BytesIO()
-    plt.savefig(chart, format="png")
+    canvas.print_png(chart)
     chart.seek(0)
-    plt.close()
     return chart
 
+# --- Helper Function: Draw Table on Canvas ---
+def draw_table(c, x, y, rows, col_widths, row_height=18,
+               header_bg=colors.grey, header_text=colors.whitesmoke):
+    """
+    Draw a simple centered grid table directly on the canvas, with its top
+    edge at y and a shaded first row. Returns the y coordinate just below
+    the table.
+    """
+    table_width = sum(col_widths)
+    top = y
+
+    # Shade the header row
+    c.setFillColor(header_bg)
+    c.rect(x, top - row_height, table_width, row_height, stroke=0, fill=1)
+
+    # Cell text
+    for i, row in enumerate(rows):
+        if i == 0:
+            c.setFont("Helvetica-Bold", 10)
+            c.setFillColor(header_text)
+        else:
+            c.setFont("Helvetica", 10)
+            c.setFillColor(colors.black)
+        text_y = top - (i + 1) * row_height + 5
+        cell_x = x
+        for value, col_width in zip(row, col_widths):
+            c.drawCentredString(cell_x + col_width / 2, text_y, str(value))
+            cell_x += col_width
+
+    # Grid lines
+    bottom = top - len(rows) * row_height
+    c.setStrokeColor(colors.black)
+    line_x = x
+    for col_width in col_widths:
+        c.line(line_x, top, line_x, bottom)
+        line_x += col_width
+    c.line(line_x, top, line_x, bottom)
+    for i in range(len(rows) + 1):
+        line_y = top - i * row_height
+        c.line(x, line_y, x + table_width, line_y)
+
+    c.setFillColor(colors.black)
+    return bottom
+
 # --- 6. Updated Generate PDF Report ---
 def generate_pdf(data, file_name, title, business_logo=None, business_name=None, insights=None):
     """
     Generate a detailed PDF report with tables, charts, and insightful reviews.
+    Pages are drawn directly on a pdfgen Canvas and flushed one at a time
+    with showPage(), instead of accumulating a Platypus flowable list and
+    running its two-pass wrap/draw layout -- so chart images are not all
+    retained in memory for the whole build.
     """
     buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # Add Business Logo
+    c = pdf_canvas.Canvas(buffer, pagesize=letter)
+    page_width, page_height = letter
+    margin = 50
+
+    reviews = insights["monthly_reviews"]
+
+    # Render all monthly charts up front in parallel -- Agg rasterization
+    # releases the GIL, so this scales with core count -- then embed them
+    # in document order below
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(reviews)))) as executor:
+        monthly_charts = list(executor.map(
+            lambda r: generate_monthly_chart(r["Month"], r["Sales"], r["Expenses"]),
+            reviews,
+        ))
+
+    # --- 1. Header: Logo, Business Name, Title ---
+    y = page_height - margin
     if business_logo:
-        logo = Image(business_logo, width=100, height=100)
-        elements.append(logo)
-
-    # Add Business Name and Title
-    elements.append(Paragraph(f"<b>{business_name or 'Business Name'}</b>", styles["Title"]))
-    elements.append(Paragraph(title, styles["Heading2"]))
-    elements.append(Paragraph(f"Report Date: {datetime.now().strftime('%Y-%m-%d')}", styles["Normal"]))
-    elements.append(Spacer(1, 12))
+        c.drawImage(ImageReader(business_logo), margin, y - 100, width=100, height=100)
+        y -= 110
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(margin, y - 18, business_name or "Business Name")
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(margin, y - 38, title)
+    c.setFont("Helvetica", 10)
+    c.drawString(margin, y - 54, f"Report Date: {datetime.now().strftime('%Y-%m-%d')}")
+    y -= 80
 
     # --- Annual Summary Table ---
-    elements.append(Paragraph("Annual Performance Summary (Detailed)", styles["Heading2"]))
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(margin, y, "Annual Performance Summary (Detailed)")
+    y -= 8
     table_data = [["Month", "Sales", "Expenses", "Profit"]]
-
-    # Add monthly performance to the table
-    for review in insights["monthly_reviews"]:
+    for review in reviews:
         table_data.append([
             review["Month"],
-            f"₦{review['Sales']:,.2f}",
-            f"₦{abs(review['Expenses']):,.2f}",
-            f"₦{review['Profit']:,.2f}"
+            review["Sales_fmt"],
+            review["Expenses_fmt"],
+            review["Profit_fmt"]
         ])
-
-    # Define column widths to make sure the table fits the page
-    col_widths = [100, 100, 100, 100]  # Adjust this if needed to fit the page
-
-    # Create the table with appropriate widths and styles
-    table = Table(table_data, colWidths=col_widths)
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-        ("INNERGRID", (0, 0), (-1, -1), 0.5, colors.black),
-        ("BOX", (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    elements.append(table)
-    elements.append(Spacer(1, 12))
+    y = draw_table(c, margin, y, table_data, [100, 100, 100, 100])
 
     # --- 2. Overall Performance Chart ---
-    aggregate_chart = generate_aggregate_chart(insights["monthly_reviews"])
-    elements.append(Paragraph("Overall Performance Chart", styles["Heading2"]))
-    elements.append(Image(aggregate_chart, width=400, height=250))
-    elements.append(PageBreak())
-
-    # --- 3. Monthly Charts and Reviews ---
-    for review in insights["monthly_reviews"]:
-        elements.append(Paragraph(f"Monthly Performance - {review['Month']}", styles["Heading2"]))
+    if y - 280 < margin:  # Not enough room left; start a fresh page
+        c.showPage()
+        y = page_height - margin
+    aggregate_chart = generate_aggregate_chart(reviews)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(margin, y - 14, "Overall Performance Chart")
+    c.drawImage(ImageReader(aggregate_chart), margin, y - 270, width=400, height=250)
+    c.showPage()
+
+    # --- 3. Monthly Charts and Reviews (one page per month) ---
+    for review, monthly_chart in zip(reviews, monthly_charts):
+        y = page_height - margin
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(margin, y - 14, f"Monthly Performance - {review['Month']}")
+        y -= 26
         table_data = [
-            ["Sales", f"₦{review['Sales']:,.2f}"],
-            ["Expenses", f"₦{abs(review['Expenses']):,.2f}"],
-            ["Profit", f"₦{review['Profit']:,.2f}"]
+            ["Sales", review["Sales_fmt"]],
+            ["Expenses", review["Expenses_fmt"]],
+            ["Profit", review["Profit_fmt"]]
         ]
-        table = Table(table_data, colWidths=[200, 200])
-        table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-            ("GRID", (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        elements.append(table)
-
-        # Add Monthly Performance Chart
-        monthly_chart = generate_monthly_chart(review["Month"], review["Sales"], review["Expenses"])
-        elements.append(Image(monthly_chart, width=400, height=250))
-        elements.append(Spacer(1, 12))
+        y = draw_table(c, margin, y, table_data, [200, 200],
+                       header_bg=colors.lightgrey, header_text=colors.black)
+
+        # Add Monthly Performance Chart (pre-rendered above)
+        c.drawImage(ImageReader(monthly_chart), margin, y - 262, width=400, height=250)
+        y -= 280
 
         # Add detailed review summary
-        elements.append(Paragraph(f"**Summary**: {review['Review']}", styles["Normal"]))
-        elements.append(PageBreak())
+        c.setFont("Helvetica", 10)
+        c.drawString(margin, y, f"Summary: {review['Review']}")
+        c.showPage()
 
     # Build PDF
-    doc.build(elements)
+    c.save()
     buffer.seek(0)
     return buffer
 
+# --- Helper Function: Cached Product Chart ---
+@st.cache_data
+def product_chart(product_performance):
+    """
+    Build the product sales bar chart. Cached so reruns triggered by other
+    widgets reuse the already-built figure instead of re-encoding it.
+    """
+    return px.bar(
+        product_performance,
+        x="Description",
+        y="Amount",
+        title="Sales Performance by Product",
+        labels={"Description": "Product", "Amount": "Sales (₦)"},
+        color="Amount",
+    )
+
+# --- Helper Function: Cached Load + Analyze Pipeline ---
+def upload_fingerprint(file):
+    """
+    Cheap identity key for an uploaded file: name, size and a digest of
+    the first 4 KiB. Avoids hashing the full upload on every rerun.
+    """
+    return (file.name, file.size, hashlib.sha256(file.getvalue()[:4096]).digest())
+
+@st.cache_data
+def load_and_analyze(_sales_bytes, sales_name, _expenses_bytes, expenses_name, fingerprint):
+    """
+    Parse the uploaded sales and expenses files, combine them and compute
+    the insights dict. Cached so Streamlit reruns triggered by other
+    widgets (e.g. editing the business name) skip re-parsing and
+    re-aggregation entirely. The byte arguments are underscore-prefixed so
+    the cache is keyed on the cheap fingerprint, not the full file bytes.
+    Raises ValueError if a required column is missing.
+    """
+    sales_bytes, expenses_bytes = _sales_bytes, _expenses_bytes
+    def read_upload(data, name):
+        if name.endswith(".csv"):
+            # PyArrow's multithreaded CSV reader beats the default C parser
+            return pd.read_csv(BytesIO(data), engine="pyarrow")
+        return pd.read_excel(BytesIO(data))
+
+    sales_df = read_upload(sales_bytes, sales_name)
+    expenses_df = read_upload(expenses_bytes, expenses_name)
+
+    # Validate Required Columns
+    required_columns = {"Date", "Description", "Amount"}
+    if not required_columns.issubset(sales_df.columns) or not required_columns.issubset(expenses_df.columns):
+        raise ValueError(f"Both files must contain the following columns: {required_columns}")
+
+    # Add 'Type' column
+    sales_df["Type"] = "Sales"
+    expenses_df["Type"] = "Expense"
+
+    # Combine Data
+    df = pd.concat([sales_df, expenses_df], ignore_index=True)
+    df = analyze_data(df)
+
+    return generate_insights(df)
+
 # --- 7. Updated Dashboard Function ---
 # --- Updated Dashboard Function ---
 def dashboard():
@@ -304,44 +544,18 @@ def dashboard():
 
     # Process Sales and Expense Files
     if sales_file and expenses_file:
-        # Load Sales Data
-        if sales_file.name.endswith(".csv"):
-            sales_df = pd.read_csv(sales_file)
-        else:
-            sales_df = pd.read_excel(sales_file)
-
-        # Load Expenses Data
-        if expenses_file.name.endswith(".csv"):
-            expenses_df = pd.read_csv(expenses_file)
-        else:
-            expenses_df = pd.read_excel(expenses_file)
-
-        # Validate Required Columns
-        required_columns = {"Date", "Description", "Amount"}
-        if not required_columns.issubset(sales_df.columns) or not required_columns.issubset(expenses_df.columns):
-            st.error(f"Both files must contain the following columns: {required_columns}")
+        # Load, combine and analyze via the cached pipeline (identical
+        # uploads hit the cache instead of re-parsing)
+        try:
+            insights = load_and_analyze(
+                sales_file.getvalue(), sales_file.name,
+                expenses_file.getvalue(), expenses_file.name,
+                (upload_fingerprint(sales_file), upload_fingerprint(expenses_file)),
+            )
+        except ValueError as e:
+            st.error(str(e))
             return
 
-        # Add 'Type' column
-        sales_df["Type"] = "Sales"
-        expenses_df["Type"] = "Expense"
-
-        # Combine Data
-        df = pd.concat([sales_df, expenses_df], ignore_index=True)
-        df = analyze_data(df)
-
-        # Check for 'Type' column
-        if 'Type' not in df.columns:
-            st.error("The 'Type' column is missing. Please ensure the data is processed correctly.")
-            return
-
-        # Filter by Type
-        sales_data = df[df['Type'] == 'Sales']
-        expense_data = df[df['Type'] == 'Expense']
-
-        # Generate Insights
-        insights = generate_insights(df)
-
         # Display Business Metrics
         st.subheader("📈 Key Business Metrics")
         col1, col2, col3 = st.columns(3)
@@ -360,25 +574,18 @@ def dashboard():
         st.markdown("### 🚩 Bottom 5 Underperforming Products")
         st.dataframe(insights["underperforming_products"])
 
-        # Visualize product performance
+        # Visualize product performance (top 50 + 'Other', figure cached)
         st.markdown("### 📊 Product Sales Visualization")
-        fig = px.bar(
-            insights["product_performance"],
-            x="Description",
-            y="Amount",
-            title="Sales Performance by Product",
-            labels={"Description": "Product", "Amount": "Sales (₦)"},
-            color="Amount",
-        )
+        fig = product_chart(insights["product_performance"])
         st.plotly_chart(fig)
 
         # Display Table and Narration
         st.subheader("📝 Insights and Recommendations")
         for review in insights["monthly_reviews"]:
             st.markdown(f"### **{review['Month']}**")
-            st.write(f"- **Sales**: ₦{review['Sales']:,.2f}")
-            st.write(f"- **Expenses**: ₦{abs(review['Expenses']):,.2f}")
-            st.write(f"- **Profit**: ₦{review['Profit']:,.2f}")
+            st.write(f"- **Sales**: {review['Sales_fmt']}")
+            st.write(f"- **Expenses**: {review['Expenses_fmt']}")
+            st.write(f"- **Profit**: {review['Profit_fmt']}")
             st.write(f"**Summary**: {review['Review']}")
         st.write(
             "📌 *Overall, reducing unnecessary expenses and improving sales of underperforming products "